@@ -1,6 +1,7 @@
 import discord
 from discord.ext import commands
 from config.settings import DISCORD_TOKEN
+from utils.tracing import tracer
 
 # Настройка intents
 intents = discord.Intents.default()
@@ -8,7 +9,7 @@ intents.members = True  # Привилегированный интент
 intents.message_content = True  # Для работы с содержимым сообщений
 
 # Создаем бота только ОДИН раз
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = commands.Bot(command_prefix="!", intents=intents, http_trace=tracer.http_trace)
 
 initial_extensions = ["cogs.voice_manager", "cogs.commands"]
 
@@ -30,8 +31,14 @@ async def setup_hook():
         except Exception as e:
             print(f"❌ Ошибка загрузки {ext}: {e}")
 
-# Устанавливаем хук
+# Закрываем сессию экспорта трасс вместе с ботом
+async def close():
+    await tracer.close()
+    await commands.Bot.close(bot)
+
+# Устанавливаем хуки
 bot.setup_hook = setup_hook
+bot.close = close
 
 if __name__ == "__main__":
     bot.run(DISCORD_TOKEN)
\ No newline at end of file
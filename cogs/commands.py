@@ -2,6 +2,8 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from .voice_manager import temp_channels
+from config.settings import CATEGORY_IDS
+from utils.tracing import tracer
 import asyncio
 
 # =============================================================================
@@ -12,6 +14,237 @@ ERROR_COLOR = discord.Color.red()          # Ошибки и предупреж
 INFO_COLOR = discord.Color.blurple()       # Информационные сообщения
 WARNING_COLOR = discord.Color.orange()     # Предупреждения
 
+# =============================================================================
+# ПАНЕЛЬ УПРАВЛЕНИЯ КОМНАТОЙ
+# custom_id кнопок должны оставаться стабильными: по ним persistent view
+# находит обработчик после перезапуска бота
+# =============================================================================
+PANEL_SETTINGS_ID = "moon:panel:settings"
+PANEL_PRIVACY_ID = "moon:panel:privacy"
+
+
+def build_room_overwrites(
+    channel: discord.VoiceChannel,
+    member: discord.Member,
+    private: bool
+) -> dict:
+    """
+    Собирает итоговые overwrites комнаты для одного вызова channel.edit.
+    
+    Args:
+        channel: Временный голосовой канал
+        member: Владелец комнаты
+        private: Включить ли приватный режим
+        
+    Returns:
+        Словарь overwrites с учетом выбранного режима
+    """
+    overwrites = dict(channel.overwrites)
+    default_role = channel.guild.default_role
+    
+    if private:
+        overwrites[default_role] = discord.PermissionOverwrite(
+            connect=False,
+            view_channel=True
+        )
+        overwrites[member] = discord.PermissionOverwrite(
+            connect=True,
+            view_channel=True,
+            manage_channels=True
+        )
+    else:
+        overwrites.pop(default_role, None)
+        
+    return overwrites
+
+
+def is_private(channel: discord.VoiceChannel) -> bool:
+    """
+    Проверяет, включен ли в комнате приватный режим.
+    
+    Args:
+        channel: Временный голосовой канал
+        
+    Returns:
+        True если подключение для @everyone запрещено
+    """
+    return channel.overwrites_for(channel.guild.default_role).connect is False
+
+
+class RoomSettingsModal(discord.ui.Modal, title="⚙️ Настройки комнаты"):
+    """Модальное окно, применяющее название, лимит и приватность одним запросом."""
+    
+    def __init__(self, cog: "ChannelCommands", channel: discord.VoiceChannel):
+        """
+        Инициализация модального окна с текущими настройками комнаты.
+        
+        Args:
+            cog: Ког команд, выполняющий изменения
+            channel: Временный голосовой канал пользователя
+        """
+        super().__init__()
+        self.cog = cog
+        self.channel = channel
+        
+        self.name_input = discord.ui.TextInput(
+            label="Название комнаты",
+            default=channel.name[:50],
+            min_length=1,
+            max_length=50
+        )
+        self.limit_input = discord.ui.TextInput(
+            label="Лимит участников (0 = без лимита)",
+            default=str(channel.user_limit),
+            max_length=2
+        )
+        self.private_input = discord.ui.TextInput(
+            label="Приватный режим (on/off)",
+            default="on" if is_private(channel) else "off",
+            max_length=3
+        )
+        
+        self.add_item(self.name_input)
+        self.add_item(self.limit_input)
+        self.add_item(self.private_input)
+
+    @tracer.traced("panel.settings_modal")
+    async def on_submit(self, interaction: discord.Interaction):
+        """
+        Валидирует введенные значения и применяет их к комнате.
+        
+        Args:
+            interaction: Объект взаимодействия Discord
+        """
+        # Модальное окно - отдельное взаимодействие, поэтому проверяем доступ повторно
+        channel = self.cog.get_user_channel(interaction)
+        if not channel or channel.id != self.channel.id:
+            embed = discord.Embed(
+                title="❌ **Доступ запрещен**",
+                description="Настройки доступны только участникам этой временной комнаты!",
+                color=ERROR_COLOR
+            )
+            return await interaction.response.send_message(embed=embed, ephemeral=True)
+            
+        name = self.name_input.value.strip()
+        limit_text = self.limit_input.value.strip()
+        mode = self.private_input.value.strip().lower()
+        
+        # Нетронутое обрезанное название не должно переименовывать комнату
+        if name == channel.name[:50]:
+            name = channel.name
+        
+        try:
+            limit = int(limit_text)
+        except ValueError:
+            limit = -1
+            
+        if not (0 <= limit <= 99):
+            embed = discord.Embed(
+                title="⚠️ **Некорректный лимит**",
+                description="Лимит участников должен быть числом **от 0 до 99**.",
+                color=ERROR_COLOR
+            )
+            return await interaction.response.send_message(embed=embed, ephemeral=True)
+            
+        if mode not in ("on", "off"):
+            embed = discord.Embed(
+                title="⚠️ **Неверный параметр**",
+                description="Приватный режим принимает только значения `on` или `off`.",
+                color=ERROR_COLOR
+            )
+            return await interaction.response.send_message(embed=embed, ephemeral=True)
+            
+        if not name:
+            embed = discord.Embed(
+                title="⚠️ **Некорректное название**",
+                description="Название комнаты должно содержать от **1 до 50 символов**.",
+                color=ERROR_COLOR
+            )
+            return await interaction.response.send_message(embed=embed, ephemeral=True)
+            
+        await self.cog.apply_room_settings(
+            interaction,
+            channel,
+            name=name,
+            limit=limit,
+            private=mode == "on"
+        )
+
+
+class RoomControlView(discord.ui.View):
+    """Persistent view с кнопками управления временной комнатой."""
+    
+    def __init__(self, cog: "ChannelCommands"):
+        """
+        Инициализация панели управления.
+        
+        Args:
+            cog: Ког команд, проверяющий владельца и выполняющий изменения
+        """
+        super().__init__(timeout=None)
+        self.cog = cog
+        
+        # Таблица диспетчеризации: custom_id -> (подпись, стиль, обработчик)
+        self.actions = {
+            PANEL_SETTINGS_ID: ("⚙️ Настроить", discord.ButtonStyle.primary, self.open_settings),
+            PANEL_PRIVACY_ID: ("🔒 Приватность", discord.ButtonStyle.secondary, self.toggle_privacy),
+        }
+        
+        for custom_id, (label, style, _) in self.actions.items():
+            button = discord.ui.Button(label=label, style=style, custom_id=custom_id)
+            button.callback = self.dispatch
+            self.add_item(button)
+
+    @tracer.traced("panel.button")
+    async def dispatch(self, interaction: discord.Interaction):
+        """
+        Находит обработчик нажатой кнопки по ее custom_id.
+        
+        Args:
+            interaction: Объект взаимодействия Discord
+        """
+        custom_id = interaction.data.get("custom_id")
+        channel = self.cog.get_user_channel(interaction)
+        
+        # Панель управляет только той комнатой, в чате которой она опубликована
+        if not channel or channel.id != interaction.channel_id:
+            embed = discord.Embed(
+                title="❌ **Доступ запрещен**",
+                description="Панель доступна только участникам этой временной комнаты!",
+                color=ERROR_COLOR
+            )
+            return await interaction.response.send_message(embed=embed, ephemeral=True)
+            
+        _, _, handler = self.actions[custom_id]
+        await handler(interaction, channel)
+
+    async def open_settings(self, interaction: discord.Interaction, channel: discord.VoiceChannel):
+        """
+        Открывает модальное окно настроек комнаты.
+        
+        Args:
+            interaction: Объект взаимодействия Discord
+            channel: Временный голосовой канал пользователя
+        """
+        await interaction.response.send_modal(RoomSettingsModal(self.cog, channel))
+
+    async def toggle_privacy(self, interaction: discord.Interaction, channel: discord.VoiceChannel):
+        """
+        Переключает приватный режим, сохраняя остальные настройки.
+        
+        Args:
+            interaction: Объект взаимодействия Discord
+            channel: Временный голосовой канал пользователя
+        """
+        await self.cog.apply_room_settings(
+            interaction,
+            channel,
+            name=channel.name,
+            limit=channel.user_limit,
+            private=not is_private(channel)
+        )
+
+
 class ChannelCommands(commands.Cog):
     """Cog для управления командами временных голосовых каналов."""
     
@@ -23,6 +256,67 @@ class ChannelCommands(commands.Cog):
             bot: Экземпляр Discord бота
         """
         self.bot = bot
+        self._rooms_restored = False  # Комнаты восстанавливаются один раз за запуск
+
+    async def cog_load(self):
+        """Регистрирует persistent view, чтобы кнопки панели работали после перезапуска."""
+        self.bot.add_view(RoomControlView(self))
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """
+        Восстанавливает список временных комнат после перезапуска бота.
+        
+        temp_channels хранится в памяти, поэтому комнаты находятся
+        заново по панели управления в их текстовом чате.
+        """
+        if self._rooms_restored:
+            return
+        self._rooms_restored = True
+        
+        restored = []
+        for category_id in CATEGORY_IDS.values():
+            category = self.bot.get_channel(category_id)
+            if not isinstance(category, discord.CategoryChannel):
+                continue
+                
+            for channel in category.voice_channels:
+                if channel.id not in temp_channels and await self.has_control_panel(channel):
+                    temp_channels.add(channel.id)
+                    restored.append(channel)
+                    
+        print(f"♻️ Восстановлено временных комнат: {len(restored)}")
+        
+        # Пустые комнаты могли остаться, пока бот был выключен
+        voice_manager = self.bot.get_cog("VoiceManager")
+        if voice_manager:
+            for channel in restored:
+                if len(channel.members) == 0:
+                    await voice_manager.safe_channel_delete(channel)
+
+    async def has_control_panel(self, channel: discord.VoiceChannel) -> bool:
+        """
+        Проверяет, опубликована ли в канале панель управления бота.
+        
+        Args:
+            channel: Голосовой канал из категории временных комнат
+            
+        Returns:
+            True если среди первых сообщений канала есть панель бота
+        """
+        try:
+            # Панель отправляется сразу после создания комнаты
+            async for message in channel.history(limit=5, oldest_first=True):
+                if message.author.id != self.bot.user.id:
+                    continue
+                for row in message.components:
+                    for component in getattr(row, "children", []):
+                        if getattr(component, "custom_id", None) == PANEL_SETTINGS_ID:
+                            return True
+        except discord.HTTPException as e:
+            print(f"⚠ Не удалось прочитать чат комнаты {channel.name}: {e}")
+            
+        return False
 
     def get_user_channel(self, interaction: discord.Interaction) -> discord.VoiceChannel | None:
         """
@@ -34,11 +328,118 @@ class ChannelCommands(commands.Cog):
         Returns:
             VoiceChannel объект или None если пользователь не в своем канале
         """
-        if not interaction.user.voice:
-            return None
+        with tracer.span("route.user_channel") as span:
+            if not interaction.user.voice:
+                span.set_attribute("route.matched", False)
+                return None
+                
+            channel = interaction.user.voice.channel
+            matched = bool(channel and channel.id in temp_channels)
+            span.set_attribute("route.matched", matched)
+            return channel if matched else None
+
+    async def send_control_panel(self, channel: discord.VoiceChannel):
+        """
+        Публикует панель управления в текстовом чате новой комнаты.
+        
+        Args:
+            channel: Временный голосовой канал
+        """
+        embed = discord.Embed(
+            title="🎛️ **Панель управления комнатой**",
+            description=(
+                "Настройте комнату в один клик!\n\n"
+                "• **⚙️ Настроить** — название, лимит и приватность в одном окне\n"
+                "• **🔒 Приватность** — быстро включить или выключить приватный режим"
+            ),
+            color=INFO_COLOR
+        )
+        embed.set_footer(text="💡 Панель работает только для участников этой комнаты")
+        
+        # Нажатия обрабатывает persistent view из cog_load по custom_id.
+        # Остановленный view не сохраняется в хранилище discord.py по ID сообщения,
+        # иначе записи копились бы для каждой удаленной комнаты
+        view = RoomControlView(self)
+        view.stop()
+        
+        await channel.send(embed=embed, view=view)
+
+    async def apply_room_settings(
+        self,
+        interaction: discord.Interaction,
+        channel: discord.VoiceChannel,
+        name: str,
+        limit: int,
+        private: bool
+    ):
+        """
+        Применяет настройки комнаты одним вызовом channel.edit.
+        
+        Передаются только изменившиеся поля, чтобы не расходовать
+        лимит Discord на переименование каналов.
+        
+        Args:
+            interaction: Объект взаимодействия Discord
+            channel: Временный голосовой канал пользователя
+            name: Новое название комнаты
+            limit: Лимит участников (0-99)
+            private: Включить ли приватный режим
+        """
+        changes = {}
+        if name != channel.name:
+            changes["name"] = name
+        if limit != channel.user_limit:
+            changes["user_limit"] = limit
+        if private != is_private(channel):
+            changes["overwrites"] = build_room_overwrites(channel, interaction.user, private)
+            
+        if not changes:
+            embed = discord.Embed(
+                title="ℹ️ **Без изменений**",
+                description="Настройки комнаты уже совпадают с указанными.",
+                color=INFO_COLOR
+            )
+            return await interaction.response.send_message(embed=embed, ephemeral=True)
+            
+        # Переименование может упереться в лимит Discord и ждать дольше,
+        # чем живет токен взаимодействия, поэтому сначала откладываем ответ
+        await interaction.response.defer(thinking=True)
+        
+        try:
+            await channel.edit(**changes)
+            
+            limit_text = "♾️ Без ограничений" if limit == 0 else f"👥 До {limit} участников"
+            privacy_text = "🔒 Приватная" if private else "🌍 Публичная"
+            
+            embed = discord.Embed(
+                title="✅ **Комната обновлена!**",
+                color=SUCCESS_COLOR
+            )
+            embed.add_field(name="🏷️ Название", value=discord.utils.escape_markdown(name), inline=False)
+            embed.add_field(name="👥 Лимит", value=limit_text, inline=True)
+            embed.add_field(name="🔐 Доступ", value=privacy_text, inline=True)
             
-        channel = interaction.user.voice.channel
-        return channel if channel and channel.id in temp_channels else None
+            await interaction.followup.send(embed=embed)
+            
+        except discord.Forbidden:
+            embed = discord.Embed(
+                title="🔐 **Ошибка прав доступа**",
+                description=(
+                    "Бот не имеет прав для изменения комнаты!\n\n"
+                    "**Необходимые права:**\n"
+                    "• Управление каналами (Manage Channels)\n"
+                    "• Управление ролями (Manage Roles)"
+                ),
+                color=ERROR_COLOR
+            )
+            await interaction.followup.send(embed=embed)
+        except Exception as e:
+            embed = discord.Embed(
+                title="⚡ **Неожиданная ошибка**",
+                description=f"Произошла ошибка при изменении комнаты: ```{str(e)}```",
+                color=ERROR_COLOR
+            )
+            await interaction.followup.send(embed=embed)
 
     # =========================================================================
     # УТИЛИТАРНЫЕ КОМАНДЫ
@@ -48,6 +449,7 @@ class ChannelCommands(commands.Cog):
         name="help", 
         description="📚 Показать список всех доступных команд для управления комнатой"
     )
+    @tracer.traced("command.help")
     async def help_cmd(self, interaction: discord.Interaction):
         """
         Отображает интерактивное руководство по командам бота.
@@ -71,7 +473,8 @@ class ChannelCommands(commands.Cog):
             ("👥 `/setlimit <число>`", "Установите лимит участников (0-99)\n*0 = без ограничений*"),
             ("🔒 `/private on/off`", "Контролируйте доступ к вашей комнате\n*Приватный/публичный режим*"),
             ("📊 `/ping`", "Проверьте скорость отклика бота и состояние системы"),
-            ("🛠️ `/permissions`", "Проверить права бота на управление комнатой")
+            ("🛠️ `/permissions`", "Проверить права бота на управление комнатой"),
+            ("🎛️ Панель управления", "Кнопки в чате комнаты: название, лимит и приватность за одно действие")
         ]
         
         for name, value in commands_info:
@@ -100,6 +503,7 @@ class ChannelCommands(commands.Cog):
         name="ping", 
         description="📊 Проверить скорость отклика бота и состояние системы"
     )
+    @tracer.traced("command.ping")
     async def ping(self, interaction: discord.Interaction):
         """
         Проверяет задержку бота и отображает статус системы.
@@ -151,6 +555,7 @@ class ChannelCommands(commands.Cog):
         description="🏷️ Изменить название вашей временной комнаты"
     )
     @app_commands.describe(name="Новое название комнаты (1-50 символов)")
+    @tracer.traced("command.setname")
     async def setname(self, interaction: discord.Interaction, name: str):
         """
         Изменяет название временной голосовой комнаты.
@@ -229,6 +634,7 @@ class ChannelCommands(commands.Cog):
         description="👥 Установить лимит участников в комнате (0 = без лимита)"
     )
     @app_commands.describe(limit="Количество участников (0-99)")
+    @tracer.traced("command.setlimit")
     async def setlimit(self, interaction: discord.Interaction, limit: int):
         """
         Устанавливает лимит участников для временной комнаты.
@@ -303,6 +709,7 @@ class ChannelCommands(commands.Cog):
         description="🔒 Переключить приватный режим комнаты (on/off)"
     )
     @app_commands.describe(mode="Режим: 'on' для приватности, 'off' для публичности")
+    @tracer.traced("command.private")
     async def private(self, interaction: discord.Interaction, mode: str):
         """
         Переключает режим приватности временной комнаты.
@@ -1,6 +1,7 @@
 import discord
 from discord.ext import commands
 from config.settings import LOBBY_CHANNELS, CATEGORY_IDS, ROOM_NAME_TEMPLATE
+from utils.tracing import tracer, SPAN_KIND_CONSUMER
 import asyncio
 
 # =============================================================================
@@ -46,6 +47,7 @@ class VoiceManager(commands.Cog):
             print(f"❌ Неожиданная ошибка при удалении комнаты {channel.name}: {e}")
 
     @commands.Cog.listener()
+    @tracer.traced("voice_state_update", kind=SPAN_KIND_CONSUMER)
     async def on_voice_state_update(self, member: discord.Member, 
                                   before: discord.VoiceState, 
                                   after: discord.VoiceState):
@@ -57,6 +59,11 @@ class VoiceManager(commands.Cog):
             before: Предыдущее голосовое состояние
             after: Новое голосовое состояние
         """
+        span = tracer.current_span()
+        span.set_attribute("discord.user_id", member.id)
+        span.set_attribute("voice.before_channel_id", before.channel.id if before.channel else 0)
+        span.set_attribute("voice.after_channel_id", after.channel.id if after.channel else 0)
+        
         # =====================================================================
         # СОЗДАНИЕ НОВОЙ КОМНАТЫ ПРИ ЗАХОДЕ В ЛОББИ
         # =====================================================================
@@ -64,11 +71,13 @@ class VoiceManager(commands.Cog):
             print(f"👤 Пользователь {member.display_name} зашел в лобби: {after.channel.name}")
             
             # Определяем тип лобби
-            lobby_type = None
-            for key, lobby_id in LOBBY_CHANNELS.items():
-                if after.channel.id == lobby_id:
-                    lobby_type = key
-                    break
+            with tracer.span("route.lobby") as route_span:
+                lobby_type = None
+                for key, lobby_id in LOBBY_CHANNELS.items():
+                    if after.channel.id == lobby_id:
+                        lobby_type = key
+                        break
+                route_span.set_attribute("lobby.type", lobby_type or "")
 
             if not lobby_type:
                 print(f"⚠ Неизвестное лобби: {after.channel.id}")
@@ -127,6 +136,14 @@ class VoiceManager(commands.Cog):
                 # Перемещаем пользователя в новую комнату
                 await member.move_to(new_channel)
                 print(f"👤 Пользователь {member.display_name} перемещен в свою комнату")
+
+                # Публикуем панель управления в текстовом чате комнаты
+                commands_cog = self.bot.get_cog("ChannelCommands")
+                if commands_cog:
+                    try:
+                        await commands_cog.send_control_panel(new_channel)
+                    except discord.HTTPException as e:
+                        print(f"⚠ Не удалось отправить панель управления в {channel_name}: {e}")
                 
             except discord.Forbidden:
                 print(f"❌ Ошибка прав: Бот не может создавать каналы в категории {category.name}")
@@ -138,7 +155,8 @@ class VoiceManager(commands.Cog):
         # =====================================================================
         if before.channel and before.channel.id in temp_channels:
             # Используем задержку для избежания race condition
-            await asyncio.sleep(2)  # Ждем 2 секунды перед проверкой
+            with tracer.span("deletion.delay"):
+                await asyncio.sleep(2)  # Ждем 2 секунды перед проверкой
             
             try:
                 # Перепроверяем канал (может быть уже удален)
@@ -152,6 +170,7 @@ class VoiceManager(commands.Cog):
                 pass
 
     @commands.Cog.listener()
+    @tracer.traced("member_remove", kind=SPAN_KIND_CONSUMER)
     async def on_member_remove(self, member: discord.Member):
         """
         Обрабатывает выход пользователя с сервера (включая бан/кик).
@@ -166,6 +185,7 @@ class VoiceManager(commands.Cog):
                 await self.safe_channel_delete(channel)
 
     @commands.Cog.listener()
+    @tracer.traced("member_ban", kind=SPAN_KIND_CONSUMER)
     async def on_member_ban(self, guild: discord.Guild, user: discord.User):
         """
         Обрабатывает бан пользователя на сервере.
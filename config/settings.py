@@ -68,4 +68,22 @@ EMPTY_ROOM_TIMEOUT = 60
 # Режим отладки (логирование дополнительной информации)
 DEBUG_MODE = os.getenv("DEBUG", "false").lower() == "true"
 
+# =============================================================================
+# ТРАССИРОВКА ОПЕРАЦИЙ
+# Трассы пишутся в формате OTLP JSON: в файл или в локальный коллектор
+# =============================================================================
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+
+# Файл для экспорта трасс (одна трасса на строку)
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "traces.jsonl")
+
+# OTLP/HTTP коллектор, например http://localhost:4318/v1/traces (пусто = запись в файл)
+TRACE_COLLECTOR_URL = os.getenv("TRACE_COLLECTOR_URL", "")
+
+# Трассы дольше этого порога (в миллисекундах) сохраняются всегда
+TRACE_SLOW_THRESHOLD_MS = int(os.getenv("TRACE_SLOW_THRESHOLD_MS", 5000))
+
+# Доля быстрых успешных трасс, сохраняемых случайно (0.0 - 1.0)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0.0))
+
 print(f"✅ Конфигурация загружена. Активных лобби: {sum(1 for x in LOBBY_CHANNELS.values() if x != 0)}")
\ No newline at end of file
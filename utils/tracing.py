@@ -0,0 +1,467 @@
+import asyncio
+import concurrent.futures
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import random
+import re
+import time
+
+import aiohttp
+import discord
+from config.settings import (
+    TRACING_ENABLED,
+    TRACE_EXPORT_FILE,
+    TRACE_COLLECTOR_URL,
+    TRACE_SLOW_THRESHOLD_MS,
+    TRACE_SAMPLE_RATE
+)
+
+# =============================================================================
+# КОНСТАНТЫ ФОРМАТА OTLP
+# Значения SpanKind и StatusCode из спецификации OpenTelemetry
+# =============================================================================
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+SPAN_KIND_CONSUMER = 5
+
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+SERVICE_NAME = "moon-bot"
+
+# Таймаут отправки трассы в коллектор (в секундах)
+COLLECTOR_TIMEOUT = 5
+
+# Текущий span активной задачи asyncio
+_current_span = contextvars.ContextVar("moon_current_span", default=None)
+
+# Токены взаимодействий и вебхуков не должны попадать в экспорт
+_TOKEN_PATH = re.compile(r"/(interactions|webhooks)/(\d+)/[^/]+")
+
+
+def _otlp_value(value) -> dict:
+    """
+    Преобразует значение атрибута в AnyValue формата OTLP JSON.
+    
+    Args:
+        value: Значение атрибута
+    
+    Returns:
+        Словарь AnyValue
+    """
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict) -> list:
+    """
+    Преобразует словарь атрибутов в список KeyValue формата OTLP JSON.
+    
+    Args:
+        attributes: Атрибуты span или события
+    
+    Returns:
+        Список KeyValue
+    """
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class Span:
+    """Один участок трассы: от события шлюза до завершения REST-запроса."""
+
+    def __init__(self, name: str, trace_id: str, parent: "Span | None", kind: int, attributes: dict):
+        """
+        Инициализация span.
+        
+        Args:
+            name: Название операции
+            trace_id: ID трассы (32 hex-символа)
+            parent: Родительский span или None для корневого
+            kind: SpanKind по спецификации OTLP
+            attributes: Начальные атрибуты
+        """
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent = parent
+        self.kind = kind
+        self.attributes = dict(attributes)
+        self.events = []
+        # Статус выставляется явно только при ошибке
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        # Монотонные часы для длительности: time_ns подвержен корректировкам NTP
+        self._start_perf_ns = time.perf_counter_ns()
+        self._end_perf_ns = None
+
+    @property
+    def duration_ms(self) -> float:
+        """Длительность span в миллисекундах."""
+        end_perf_ns = self._end_perf_ns or time.perf_counter_ns()
+        return (end_perf_ns - self._start_perf_ns) / 1_000_000
+
+    def end(self):
+        """Фиксирует время завершения span."""
+        self.end_ns = time.time_ns()
+        self._end_perf_ns = time.perf_counter_ns()
+
+    def set_attribute(self, key: str, value):
+        """
+        Устанавливает атрибут span.
+        
+        Args:
+            key: Название атрибута
+            value: Значение атрибута
+        """
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes):
+        """
+        Добавляет событие с отметкой времени.
+        
+        Args:
+            name: Название события
+            **attributes: Атрибуты события
+        """
+        self.events.append((time.time_ns(), name, attributes))
+
+    def record_exception(self, error: BaseException):
+        """
+        Отмечает span как ошибочный и сохраняет информацию об исключении.
+        
+        Args:
+            error: Перехваченное исключение
+        """
+        self.status = STATUS_ERROR
+        self.status_message = str(error)
+        self.add_event(
+            "exception",
+            **{"exception.type": type(error).__name__, "exception.message": str(error)}
+        )
+
+    def to_otlp(self) -> dict:
+        """
+        Сериализует span в формат OTLP JSON.
+        
+        Returns:
+            Словарь Span
+        """
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "events": [
+                {"timeUnixNano": str(ts), "name": name, "attributes": _otlp_attributes(attrs)}
+                for ts, name, attrs in self.events
+            ],
+            "status": {"code": self.status, "message": self.status_message}
+        }
+        if self.parent:
+            span["parentSpanId"] = self.parent.span_id
+        return span
+
+
+class _NoopSpan:
+    """Заглушка span, используемая при выключенной трассировке."""
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def add_event(self, name: str, **attributes):
+        pass
+
+    def record_exception(self, error: BaseException):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Легковесный трассировщик с tail-based сэмплированием и экспортом в OTLP JSON."""
+
+    def __init__(self):
+        """Инициализация трассировщика из настроек окружения."""
+        self.enabled = TRACING_ENABLED
+        self._traces = {}  # trace_id -> список завершенных span трассы
+        self._export_tasks = set()  # Задачи экспорта трасс
+        self._session = None  # Сессия для отправки в коллектор
+        # Один поток записи, чтобы строки разных трасс не перемешивались в файле
+        self._file_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    def current_span(self):
+        """
+        Возвращает активный span текущей задачи.
+        
+        Returns:
+            Span или заглушка, если трассировка неактивна
+        """
+        return _current_span.get() or _NOOP_SPAN
+
+    @contextlib.contextmanager
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+        """
+        Открывает span как дочерний для текущего или начинает новую трассу.
+        
+        Args:
+            name: Название операции
+            kind: SpanKind по спецификации OTLP
+            **attributes: Начальные атрибуты
+        """
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        
+        parent = _current_span.get()
+        trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        span = Span(name, trace_id, parent, kind, attributes)
+        token = _current_span.set(span)
+        
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            span.end()
+            _current_span.reset(token)
+            self._traces.setdefault(trace_id, []).append(span)
+            if parent is None:
+                self._finish_trace(span)
+
+    @property
+    def http_trace(self) -> "aiohttp.TraceConfig | None":
+        """
+        TraceConfig для HTTP-клиента discord.py.
+        
+        Каждый REST-запрос, включая ответы на взаимодействия и повторы
+        после 429, становится дочерним span текущей операции.
+        
+        Returns:
+            TraceConfig или None при выключенной трассировке
+        """
+        if not self.enabled:
+            return None
+        
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_request_end.append(self._on_request_end)
+        trace_config.on_request_exception.append(self._on_request_exception)
+        return trace_config
+
+    async def _on_request_start(self, session, trace_config_ctx, params: aiohttp.TraceRequestStartParams):
+        """
+        Открывает span REST-запроса внутри текущей операции.
+        
+        Args:
+            session: Сессия aiohttp
+            trace_config_ctx: Контекст трассировки запроса
+            params: Параметры запроса
+        """
+        parent = _current_span.get()
+        if parent is None:
+            # Запросы вне отслеживаемых операций (например, синхронизация команд) не пишем
+            trace_config_ctx.span = None
+            return
+        
+        path = _TOKEN_PATH.sub(r"/\1/\2/:token", params.url.path)
+        trace_config_ctx.span = Span(
+            f"HTTP {params.method}",
+            parent.trace_id,
+            parent,
+            SPAN_KIND_CLIENT,
+            {"http.method": params.method, "http.route": path}
+        )
+
+    async def _on_request_end(self, session, trace_config_ctx, params: aiohttp.TraceRequestEndParams):
+        """
+        Закрывает span REST-запроса и отмечает ответы с ошибкой и 429.
+        
+        Args:
+            session: Сессия aiohttp
+            trace_config_ctx: Контекст трассировки запроса
+            params: Параметры запроса и ответ
+        """
+        span = trace_config_ctx.span
+        if span is None:
+            return
+        
+        status = params.response.status
+        span.set_attribute("http.status_code", status)
+        
+        if status == 429:
+            headers = params.response.headers
+            try:
+                retry_after = float(headers.get("X-RateLimit-Reset-After") or headers.get("Retry-After") or 0)
+            except ValueError:
+                # Трассировка не должна ломать сам запрос из-за некорректного заголовка
+                retry_after = 0.0
+            span.set_attribute("http.retry_after_s", retry_after)
+            span.add_event("http.rate_limited", retry_after_s=retry_after)
+        
+        if status >= 400:
+            span.status = STATUS_ERROR
+            span.status_message = f"HTTP {status}"
+        
+        self._end_request_span(span)
+
+    async def _on_request_exception(self, session, trace_config_ctx, params: aiohttp.TraceRequestExceptionParams):
+        """
+        Закрывает span REST-запроса, завершившегося исключением.
+        
+        Args:
+            session: Сессия aiohttp
+            trace_config_ctx: Контекст трассировки запроса
+            params: Параметры запроса и исключение
+        """
+        span = trace_config_ctx.span
+        if span is None:
+            return
+        
+        span.record_exception(params.exception)
+        self._end_request_span(span)
+
+    def _end_request_span(self, span: Span):
+        """
+        Завершает span REST-запроса и добавляет его в трассу.
+        
+        Args:
+            span: Span REST-запроса
+        """
+        span.end()
+        self._traces.setdefault(span.trace_id, []).append(span)
+
+    def _finish_trace(self, root: Span):
+        """
+        Принимает решение о сохранении трассы после завершения корневого span.
+        
+        Сохраняются медленные и ошибочные трассы, а также случайная доля
+        остальных согласно TRACE_SAMPLE_RATE.
+        
+        Args:
+            root: Завершившийся корневой span
+        """
+        spans = self._traces.pop(root.trace_id, [])
+        
+        is_slow = root.duration_ms >= TRACE_SLOW_THRESHOLD_MS
+        has_error = any(span.status == STATUS_ERROR for span in spans)
+        if not (is_slow or has_error or random.random() < TRACE_SAMPLE_RATE):
+            return
+        
+        root.set_attribute("sampling.reason", "error" if has_error else "slow" if is_slow else "random")
+        self._export(spans)
+
+    def _export(self, spans: list):
+        """
+        Экспортирует трассу в коллектор или в файл.
+        
+        Args:
+            spans: Все span одной трассы
+        """
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+                "scopeSpans": [{
+                    "scope": {"name": "moon.tracing"},
+                    "spans": [span.to_otlp() for span in spans]
+                }]
+            }]
+        }
+        
+        # Экспорт выполняется в фоне, чтобы не добавлять задержку к измеряемым операциям
+        if TRACE_COLLECTOR_URL:
+            task = asyncio.ensure_future(self._post(payload))
+        else:
+            task = asyncio.get_running_loop().run_in_executor(
+                self._file_executor,
+                self._write,
+                json.dumps(payload, ensure_ascii=False)
+            )
+        
+        self._export_tasks.add(task)
+        task.add_done_callback(self._export_tasks.discard)
+
+    def _write(self, line: str):
+        """
+        Дописывает трассу в файл экспорта. Выполняется в единственном потоке записи.
+        
+        Args:
+            line: Сериализованная трасса
+        """
+        try:
+            with open(TRACE_EXPORT_FILE, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+        except OSError as e:
+            print(f"⚠ Не удалось записать трассу в {TRACE_EXPORT_FILE}: {e}")
+
+    async def _post(self, payload: dict):
+        """
+        Отправляет трассу в OTLP/HTTP коллектор.
+        
+        Args:
+            payload: Тело запроса ExportTraceServiceRequest
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=COLLECTOR_TIMEOUT)
+            )
+        
+        try:
+            async with self._session.post(TRACE_COLLECTOR_URL, json=payload) as response:
+                if response.status >= 400:
+                    print(f"⚠ Коллектор трасс ответил статусом {response.status}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"⚠ Не удалось отправить трассу в коллектор: {e!r}")
+
+    async def close(self):
+        """Дожидается экспорта сохраненных трасс и закрывает сессию коллектора."""
+        if self._export_tasks:
+            await asyncio.gather(*self._export_tasks, return_exceptions=True)
+        
+        if self._session is not None:
+            await self._session.close()
+        self._file_executor.shutdown(wait=True)
+
+    def traced(self, name: str, kind: int = SPAN_KIND_SERVER):
+        """
+        Декоратор, открывающий корневой span на время работы обработчика.
+        
+        Сохраняет сигнатуру функции, поэтому применяется под
+        app_commands.command и Cog.listener.
+        
+        Args:
+            name: Название операции
+            kind: SpanKind по спецификации OTLP
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.span(name, kind=kind) as span:
+                    for arg in args:
+                        if isinstance(arg, discord.Interaction):
+                            span.set_attribute("discord.user_id", arg.user.id)
+                            span.set_attribute("discord.channel_id", arg.channel_id or 0)
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+# =============================================================================
+# ГЛОБАЛЬНЫЙ ТРАССИРОВЩИК
+# =============================================================================
+tracer = Tracer()